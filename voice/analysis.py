@@ -0,0 +1,338 @@
+"""
+Post-Session Analysis
+
+Computes the final feedback for a practice session after the bot has exited,
+so every session gets a summary even if the model never called
+`generate_feedback_summary` (e.g. the user hung up). It includes:
+- Saving the transcript and practice_tools events when a bot finishes
+- A deterministic analysis of that data, scored with `calculate_success_score`
+- A job queue that runs analyses in a low-priority process pool, so a burst of
+  sessions ending at once doesn't take CPU away from live audio pipelines
+
+The analysis functions only depend on the standard library and practice_tools,
+which keeps the worker processes light.
+"""
+
+import asyncio
+import json
+import os
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from practice_tools import calculate_success_score
+
+# Words counted as filler when looking at how the user speaks
+FILLER_WORDS = {"um", "uh", "erm", "hmm", "like", "basically", "actually", "literally", "so"}
+
+POSITIVE_TONES = {"calm", "empathetic"}
+NEGATIVE_TONES = {"defensive", "aggressive"}
+ALIGNED_EMOTIONS = {"calm", "confident", "empathetic"}
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(max(1, (os.cpu_count() or 1) // 4))))
+ANALYSIS_NICE = int(os.getenv("ANALYSIS_NICE", "10"))
+
+
+def session_data_dir() -> str:
+    """Directory where bots save finished sessions and feedback is written."""
+    return os.getenv("SESSION_DATA_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "sessions"
+    )
+
+
+def session_path(session_id: str) -> str:
+    return os.path.join(session_data_dir(), f"{session_id}.json")
+
+
+def feedback_path(session_id: str) -> str:
+    return os.path.join(session_data_dir(), f"{session_id}.feedback.json")
+
+
+def unanalyzed_sessions() -> List[str]:
+    """IDs of saved sessions that have no feedback yet, oldest first."""
+    directory = session_data_dir()
+    if not os.path.isdir(directory):
+        return []
+    saved = [
+        name[: -len(".json")]
+        for name in os.listdir(directory)
+        if name.endswith(".json") and not name.endswith(".feedback.json")
+    ]
+    pending = [session_id for session_id in saved if not os.path.exists(feedback_path(session_id))]
+    return sorted(pending, key=lambda session_id: os.path.getmtime(session_path(session_id)))
+
+
+def _without_circular_feedback(conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy conversation_data without final_feedback's detailed_tracking.
+
+    generate_feedback_summary stores conversation_data inside its own
+    final_feedback entry, which json can't serialize.
+    """
+    data = dict(conversation_data)
+    if isinstance(data.get("final_feedback"), dict):
+        data["final_feedback"] = {
+            k: v for k, v in data["final_feedback"].items() if k != "detailed_tracking"
+        }
+    return data
+
+
+def save_session(session_id: str, transcript: List[Dict[str, Any]], conversation_data: Dict[str, Any], **extra):
+    """Save a finished session for post-session analysis."""
+    os.makedirs(session_data_dir(), exist_ok=True)
+    session = {
+        "session_id": session_id,
+        "ended_at": datetime.now().isoformat(),
+        "transcript": transcript,
+        "conversation_data": _without_circular_feedback(conversation_data),
+        **extra,
+    }
+    # Write then rename so the server never picks up a half-written file
+    path = session_path(session_id)
+    try:
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(session, f, default=str)
+        os.replace(f"{path}.tmp", path)
+    except (OSError, TypeError, ValueError):
+        if os.path.exists(f"{path}.tmp"):
+            os.remove(f"{path}.tmp")
+        raise
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return statistics.mean(values) if values else None
+
+
+def transcript_stats(transcript: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Word counts, filler usage and talk share from the transcript."""
+    user_words: List[str] = []
+    bot_word_count = 0
+    user_turns = bot_turns = 0
+
+    for entry in transcript:
+        words = entry.get("text", "").split()
+        if entry.get("role") == "user":
+            user_turns += 1
+            user_words.extend(w.strip(".,!?;:").lower() for w in words)
+        else:
+            bot_turns += 1
+            bot_word_count += len(words)
+
+    fillers = sum(1 for w in user_words if w in FILLER_WORDS)
+    total_words = len(user_words) + bot_word_count
+
+    return {
+        "user_turns": user_turns,
+        "bot_turns": bot_turns,
+        "user_words": len(user_words),
+        "filler_words": fillers,
+        "filler_rate": fillers / len(user_words) if user_words else 0.0,
+        "user_talk_share": len(user_words) / total_words if total_words else 0.0,
+    }
+
+
+def infer_ending(conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Infer the ending evaluation when the model never called evaluate_conversation_ending."""
+    milestones = [m.get("type") for m in conversation_data.get("milestones", [])]
+    goal_progress = conversation_data.get("goal_progress", [])
+    emotions = conversation_data.get("emotional_tracking", [])
+
+    last_milestone = milestones[-1] if milestones else None
+    if last_milestone in ("resolution", "breakthrough"):
+        ending_quality = "positive"
+    elif last_milestone == "conflict":
+        ending_quality = "negative"
+    elif last_milestone in ("deflection", "avoidance"):
+        ending_quality = "unresolved"
+    else:
+        ending_quality = "neutral"
+
+    goal_achieved = bool(goal_progress) and goal_progress[-1].get("on_track", False)
+
+    positive = milestones.count("resolution") + milestones.count("breakthrough")
+    negative = milestones.count("conflict")
+    ended_aligned = bool(emotions) and emotions[-1].get("user_emotion") in ALIGNED_EMOTIONS
+    if positive > negative and ended_aligned:
+        relationship_impact = "strengthened"
+    elif negative > positive:
+        relationship_impact = "weakened"
+    else:
+        relationship_impact = "maintained"
+
+    return {
+        "ending_quality": ending_quality,
+        "goal_achieved": goal_achieved,
+        "relationship_impact": relationship_impact,
+        "inferred": True,
+    }
+
+
+def analyze_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the final feedback for a saved session.
+
+    The result has the same shape as `generate_feedback_summary` feedback, plus the
+    transcript statistics and the model's own summary when it produced one.
+    """
+    data = session.get("conversation_data", {})
+    stats = transcript_stats(session.get("transcript", []))
+
+    quality = data.get("quality_tracking", [])
+    avg_clarity = _mean([q["clarity"] for q in quality if q.get("clarity") is not None])
+    avg_listening = _mean([q["listening_quality"] for q in quality if q.get("listening_quality") is not None])
+    empathy_rate = _mean([1.0 if q.get("empathy_shown") else 0.0 for q in quality])
+    tones = Counter(q.get("tone") for q in quality if q.get("tone"))
+
+    goal_progress = data.get("goal_progress", [])
+    goal_alignment = goal_progress[-1].get("goal_alignment") if goal_progress else None
+
+    ending = dict(data.get("ending_evaluation") or infer_ending(data))
+    ending["success_score"] = calculate_success_score(
+        ending.get("ending_quality", "neutral"),
+        bool(ending.get("goal_achieved")),
+        ending.get("relationship_impact", "maintained"),
+    )
+
+    components = [ending["success_score"]] + [
+        value for value in (avg_clarity, avg_listening, goal_alignment) if value is not None
+    ]
+    overall_score = max(1, min(10, round(statistics.mean(components))))
+
+    strengths = []
+    if avg_clarity is not None and avg_clarity >= 7:
+        strengths.append(f"Clear communication (average clarity {avg_clarity:.1f}/10)")
+    if avg_listening is not None and avg_listening >= 7:
+        strengths.append(f"Listened well (average {avg_listening:.1f}/10)")
+    if empathy_rate is not None and empathy_rate >= 0.5:
+        strengths.append("Showed empathy in most exchanges")
+    if tones and tones.most_common(1)[0][0] in POSITIVE_TONES:
+        strengths.append(f"Kept a mostly {tones.most_common(1)[0][0]} tone")
+    if ending["goal_achieved"]:
+        strengths.append("Reached the conversation goal")
+
+    suggestions = sorted(
+        data.get("technique_suggestions", []),
+        key=lambda s: PRIORITY_ORDER.get(s.get("priority"), len(PRIORITY_ORDER)),
+    )
+
+    improvements = []
+    for suggestion in suggestions:
+        technique = suggestion.get("technique", "").replace("_", " ")
+        if technique and technique not in improvements:
+            improvements.append(technique)
+    negative_tones = sum(tones[t] for t in NEGATIVE_TONES)
+    if quality and negative_tones / len(quality) >= 0.3:
+        improvements.append("staying calm instead of becoming defensive")
+    if avg_clarity is not None and avg_clarity < 5:
+        improvements.append("making requests and feelings more explicit")
+    if stats["filler_rate"] > 0.08:
+        improvements.append("reducing filler words")
+
+    examples = [
+        f"{m.get('type')}: {m['description']}"
+        for m in data.get("milestones", [])
+        if m.get("description")
+    ]
+
+    # save_session already dropped the circular detailed_tracking
+    model_feedback = data.get("final_feedback")
+
+    return {
+        "session_id": session.get("session_id"),
+        "timestamp": datetime.now().isoformat(),
+        "source": "post_session_analysis",
+        "overall_score": overall_score,
+        "success_score": ending["success_score"],
+        "strengths": "; ".join(strengths),
+        "areas_for_improvement": "; ".join(improvements),
+        "specific_examples": "; ".join(examples[-3:]),
+        "recommended_practice": improvements[0] if improvements else "repeat this scenario with a harder persona",
+        "ending_evaluation": ending,
+        "conversation_analytics": {
+            "total_milestones": len(data.get("milestones", [])),
+            "quality_checks": len(quality),
+            "emotional_shifts": len(data.get("emotional_tracking", [])),
+            "technique_suggestions": len(data.get("technique_suggestions", [])),
+            "average_clarity": avg_clarity,
+            "average_listening": avg_listening,
+            "empathy_rate": empathy_rate,
+            "tones": dict(tones),
+        },
+        "transcript_stats": stats,
+        "model_feedback": model_feedback,
+    }
+
+
+def run_analysis(session_id: str) -> Dict[str, Any]:
+    """Analyze a saved session and write its feedback file (runs in a worker process)."""
+    with open(session_path(session_id)) as f:
+        session = json.load(f)
+
+    feedback = analyze_session(session)
+
+    path = feedback_path(session_id)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(feedback, f, default=str)
+    os.replace(f"{path}.tmp", path)
+
+    return {"session_id": session_id, "overall_score": feedback["overall_score"]}
+
+
+def _lower_priority():
+    try:
+        os.nice(ANALYSIS_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class AnalysisQueue:
+    """Job queue that runs post-session analyses in a low-priority process pool."""
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS):
+        self._workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._consumers: List[asyncio.Task] = []
+        self.pending = set()
+
+    def start(self):
+        self._pool = ProcessPoolExecutor(max_workers=self._workers, initializer=_lower_priority)
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self._workers)]
+
+    def submit(self, session_id: str) -> bool:
+        """Queue a finished session for analysis; returns False if it has no saved data."""
+        if not os.path.exists(session_path(session_id)):
+            logger.warning(f"No saved data for session {session_id}, skipping analysis")
+            return False
+        self.pending.add(session_id)
+        self._queue.put_nowait(session_id)
+        return True
+
+    async def join(self):
+        """Wait until every queued analysis has finished."""
+        await self._queue.join()
+
+    async def close(self):
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            session_id = await self._queue.get()
+            try:
+                result = await loop.run_in_executor(self._pool, run_analysis, session_id)
+                logger.info(f"Analyzed session {session_id}: overall score {result['overall_score']}/10")
+            except Exception as e:
+                logger.error(f"Analysis failed for session {session_id}: {e}")
+            finally:
+                self.pending.discard(session_id)
+                self._queue.task_done()
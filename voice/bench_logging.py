@@ -0,0 +1,122 @@
+"""
+Logging Benchmark
+
+Measures how much logging stalls the event loop while many simulated sessions
+log at bot-like rates. Each session logs a sampled "frame" debug record every
+few milliseconds and a "practice_tool" info record now and then, while a monitor
+task measures how late the loop wakes it up.
+
+Modes:
+- off: no handler installed
+- plain: plain loguru handler writing directly (the old bot setup)
+- sync / sync-sampled: the JSON handler from logging_setup.py, written on the
+  loop thread, without and with sampling
+- background / background-sampled: the same through the background writer, as
+  the bots run it (with sampling)
+
+Each pair changes one variable: sync vs background shows what moving writes off
+the loop buys, and each -sampled row shows what sampling adds on top.
+
+Usage:
+    python bench_logging.py [--sessions 200] [--seconds 10] [--sink /tmp/bench.log]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from loguru import logger
+
+from logging_setup import LOG_DEBUG_SAMPLE_RATE, LOG_EVENT_RATE, setup_logging
+
+MONITOR_INTERVAL_SECS = 0.005
+
+
+async def monitor_loop(stop: asyncio.Event, lags: list):
+    """Record how late the loop resumes a task that sleeps for a fixed interval."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(MONITOR_INTERVAL_SECS)
+        lags.append(time.perf_counter() - started - MONITOR_INTERVAL_SECS)
+
+
+async def simulated_session(session_id: int, stop: asyncio.Event):
+    session_logger = logger.bind(session_id=str(session_id))
+    frames = 0
+    while not stop.is_set():
+        frames += 1
+        session_logger.bind(event="frame").debug(f"Processing InputAudioRawFrame #{frames}")
+        if frames % 50 == 0:
+            session_logger.bind(event="practice_tool").info(f"[QUALITY TRACKED] Clarity: {frames % 10}/10")
+        await asyncio.sleep(0.02)
+
+
+async def run(sessions: int, seconds: float) -> dict:
+    stop = asyncio.Event()
+    lags: list = []
+    tasks = [asyncio.create_task(simulated_session(i, stop)) for i in range(sessions)]
+    monitor = asyncio.create_task(monitor_loop(stop, lags))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(monitor, *tasks)
+    await logger.complete()
+
+    ordered = sorted(lags)
+    return {
+        "stall_total_ms": sum(lag for lag in lags if lag > 0) * 1000,
+        "lag_median_ms": statistics.median(ordered) * 1000,
+        "lag_p99_ms": ordered[int(len(ordered) * 0.99)] * 1000,
+        "lag_max_ms": ordered[-1] * 1000,
+    }
+
+
+MODES = ("off", "plain", "sync", "sync-sampled", "background", "background-sampled")
+
+
+def configure(mode: str, sink: str, debug_sample_rate: float, event_rate: int):
+    logger.remove()
+    if mode == "plain":
+        logger.add(sink, level="DEBUG")
+    elif mode != "off":
+        sampled = mode.endswith("-sampled")
+        setup_logging(
+            "bench",
+            sink=sink,
+            level="DEBUG",
+            format="json",
+            debug_sample_rate=debug_sample_rate if sampled else 1.0,
+            event_rate=event_rate if sampled else 0,
+            background=mode.startswith("background"),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop stalls caused by logging")
+    parser.add_argument("--sessions", type=int, default=200, help="Number of simulated sessions")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run")
+    parser.add_argument("--sink", type=str, default=None, help="Log file to write (default: a temp file)")
+    parser.add_argument(
+        "--debug-sample-rate", type=float, default=LOG_DEBUG_SAMPLE_RATE, help="DEBUG sample rate in -sampled modes"
+    )
+    parser.add_argument("--event-rate", type=int, default=LOG_EVENT_RATE, help="Events per second in -sampled modes")
+    args = parser.parse_args()
+
+    sink = args.sink or os.path.join(tempfile.mkdtemp(), "bench.log")
+    print(f"{args.sessions} sessions, {args.seconds:.0f}s per run, logging to {sink}")
+    print(f"-sampled modes keep DEBUG at {args.debug_sample_rate} and events at {args.event_rate}/s")
+
+    for mode in MODES:
+        configure(mode, sink, args.debug_sample_rate, args.event_rate)
+        result = asyncio.run(run(args.sessions, args.seconds))
+        logger.remove()
+        print(
+            f"{mode:>18}: stall {result['stall_total_ms']:8.1f} ms, median lag {result['lag_median_ms']:.2f} ms, "
+            f"p99 {result['lag_p99_ms']:.2f} ms, max {result['lag_max_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
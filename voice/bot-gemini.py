@@ -7,12 +7,17 @@ It includes:
 - Speech-to-speech using the Gemini Multimodal Live API
 - Transcription using Gemini's generate_content API
 - RTVI client/server events
+- Optional session recording (set SESSION_RECORDING_DIR)
+- Saving the transcript for post-session analysis
+- Turn-taking metrics (response gap, premature responses, false interrupts)
+- Automatic reconnection if the Gemini Live connection drops
+- Per-session resource accounting and budgets
 """
 
 import asyncio
 from datetime import date
-import sys
 import os
+import time
 
 import aiohttp
 from requests import get
@@ -21,7 +26,7 @@ from runner import configure
 
 from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.audio.vad.vad_analyzer import VADParams
-from pipecat.frames.frames import Frame, EndFrame, TranscriptionFrame
+from pipecat.frames.frames import Frame, EndFrame, TextFrame, TranscriptionFrame
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
@@ -33,13 +38,19 @@ from pipecat.processors.frameworks.rtvi import (
     RTVISpeakingProcessor,
     RTVIUserTranscriptionProcessor,
 )
-from pipecat.services.gemini_multimodal_live.gemini import GeminiMultimodalLiveLLMService
 from pipecat.transports.services.daily import DailyParams, DailyTransport
 from dotenv import load_dotenv
 
-logger.remove(0)
-logger.add(sys.stderr, level="DEBUG")
+from analysis import save_session
+from endpointing import VAD_STOP_SECS, TurnTakingMonitor
+from gemini_resilience import ResilientGeminiLiveLLMService
+from logging_setup import set_log_context, setup_logging
+from practice_tools import get_conversation_data
+from recorder import SessionRecorder
+from session_accounting import SessionAccountant
+
 load_dotenv()
+setup_logging("bot")
 
 class UserTranscriptionFrameFilter(FrameProcessor):
     """Filter out UserTranscription frames."""
@@ -53,6 +64,31 @@ class UserTranscriptionFrameFilter(FrameProcessor):
         await self.push_frame(frame, direction)
 
 
+class TranscriptCollector(FrameProcessor):
+    """Collect user and bot transcripts for post-session analysis."""
+
+    def __init__(self):
+        super().__init__()
+        self.transcript = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, TranscriptionFrame):
+            self._append("user" if frame.user_id == "user" else frame.user_id, frame.text)
+        elif isinstance(frame, TextFrame):
+            self._append("assistant", frame.text)
+
+        await self.push_frame(frame, direction)
+
+    def _append(self, role: str, text: str):
+        # Bot transcription arrives in pieces, so merge consecutive entries per role
+        if self.transcript and self.transcript[-1]["role"] == role:
+            self.transcript[-1]["text"] = f"{self.transcript[-1]['text']} {text}".strip()
+        else:
+            self.transcript.append({"role": role, "text": text.strip(), "timestamp": time.time()})
+
+
 async def main():
     """Main bot execution function.
 
@@ -64,7 +100,8 @@ async def main():
     - RTVI event handling
     """
     async with aiohttp.ClientSession() as session:
-        (room_url, token, custom_prompt) = await configure(session)
+        (room_url, token, custom_prompt, session_id) = await configure(session)
+        set_log_context(session_id=session_id, room_url=room_url)
         
         # Default system instruction for practice conversations
         SYSTEM_INSTRUCTION = f"""
@@ -99,7 +136,7 @@ async def main():
                 camera_out_height=576,
                 vad_enabled=True,
                 vad_audio_passthrough=True,
-                vad_analyzer=SileroVADAnalyzer(params=VADParams(stop_secs=0.5)),
+                vad_analyzer=SileroVADAnalyzer(params=VADParams(stop_secs=VAD_STOP_SECS)),
             ),
         )
 
@@ -203,9 +240,15 @@ async def main():
         # Use custom prompt if provided, otherwise use default practice prompt
         final_system_instruction = custom_prompt if custom_prompt else SYSTEM_INSTRUCTION
         
-        # Initialize the Gemini Multimodal Live model
-        llm = GeminiMultimodalLiveLLMService(
+        # Optional endpoint override, e.g. a local stand-in (see gemini_standin.py)
+        gemini_base_url = os.getenv("GEMINI_BASE_URL")
+
+        # Initialize the Gemini Multimodal Live model; it reconnects and resumes
+        # the conversation if the websocket drops
+        llm = ResilientGeminiLiveLLMService(
             api_key=os.getenv('GEMINI_API_KEY'),
+            **({"base_url": gemini_base_url} if gemini_base_url else {}),
+            practice_state=get_conversation_data,
             voice_id="Kore",  # Options: Aoede, Charon, Fenrir, Kore, Puck
             transcribe_user_audio=True,
             transcribe_model_audio=True,
@@ -248,11 +291,27 @@ async def main():
         rtvi_bot_transcription = RTVIBotTranscriptionProcessor()
         rtvi_metrics = RTVIMetricsProcessor()
 
+        # Optional recorder for offline replay (see replay.py)
+        recorder = SessionRecorder.from_env(session_id)
+        transcript_collector = TranscriptCollector()
+
+        async def end_session_over_budget(reason: str):
+            logger.warning(f"Ending session over budget: {reason}")
+            await task.queue_frame(EndFrame())
+
+        accountant = SessionAccountant(session_id, context, on_budget_exceeded=end_session_over_budget)
+
         pipeline = Pipeline(
             [
                 transport.input(),
+                *([recorder.input()] if recorder else []),
+                accountant.input(),
+                TurnTakingMonitor(),
                 context_aggregator.user(),
                 llm,
+                *([recorder.output()] if recorder else []),
+                accountant.output(),
+                transcript_collector,
                 rtvi_speaking,
                 rtvi_user_transcription,
                 UserTranscriptionFrameFilter(),
@@ -279,12 +338,31 @@ async def main():
 
         @transport.event_handler("on_participant_left")
         async def on_participant_left(transport, participant, reason):
-            print(f"Participant left: {participant}")
+            logger.info(f"Participant left: {participant}")
             await task.queue_frame(EndFrame())
 
         runner = PipelineRunner()
 
-        await runner.run(task)
+        reporter = asyncio.create_task(accountant.run_reporter(session))
+        try:
+            await runner.run(task)
+        finally:
+            reporter.cancel()
+            if recorder:
+                recorder.close()
+            usage = await accountant.report(session, final=True)
+            logger.info(f"Session usage: {usage}")
+            # The server analyzes the saved session once this process exits
+            try:
+                save_session(
+                    session_id,
+                    transcript_collector.transcript,
+                    get_conversation_data(),
+                    reconnects=llm.reconnect_metrics(),
+                    usage=usage,
+                )
+            except Exception as e:
+                logger.error(f"Failed to save session {session_id} for analysis: {e}")
 
 
 if __name__ == "__main__":
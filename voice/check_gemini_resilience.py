@@ -0,0 +1,134 @@
+"""
+Gemini Reconnection Check
+
+Runs ResilientGeminiLiveLLMService (see gemini_resilience.py) against the local
+Gemini stand-in and checks that it:
+- Connects on the first audio it sends
+- Reconnects after the stand-in drops the connection
+- Replays history only after the new session acknowledged setup
+- Replays the audio buffered while reconnecting
+
+It generates a throwaway certificate with openssl, because the service always
+connects over wss://. Exits non-zero if a check fails.
+
+Usage:
+    python check_gemini_resilience.py [--drop-after 2] [--seconds 5]
+"""
+
+import argparse
+import asyncio
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+from typing import List, Tuple
+
+import websockets
+from loguru import logger
+
+from pipecat.frames.frames import EndFrame, InputAudioRawFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+
+from gemini_standin import handle_connection
+
+# Slow enough that history sent without waiting for setupComplete would show up first
+SETUP_DELAY_SECS = 0.3
+
+# 20 ms of 16 kHz mono silence
+SILENCE = b"\x00\x00" * 320
+
+
+def make_certificate(directory: str) -> Tuple[str, str]:
+    certfile = os.path.join(directory, "standin.crt")
+    keyfile = os.path.join(directory, "standin.key")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+            "-keyout", keyfile, "-out", certfile,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def check_events(events: List[Tuple[str, str]], reconnect_count: int) -> List[str]:
+    """Failures found in the messages the stand-in received."""
+    failures = []
+    connections = list(dict.fromkeys(connection_id for connection_id, _ in events))
+    by_connection = {c: [kind for connection_id, kind in events if connection_id == c] for c in connections}
+
+    if not connections:
+        return ["the service never connected"]
+    if by_connection[connections[0]][:1] != ["setup"]:
+        failures.append(f"first connection did not start with setup: {by_connection[connections[0]][:3]}")
+    if len(connections) < 2 or reconnect_count < 1:
+        failures.append(f"no reconnect ({len(connections)} connections, reconnect_count {reconnect_count})")
+
+    resumed = connections[1:]
+    # Shutdown can close the last connection before its setup was acknowledged
+    if resumed and "setupComplete" not in by_connection[resumed[-1]]:
+        resumed = resumed[:-1]
+    if connections[1:] and not resumed:
+        failures.append("no resumed connection completed setup")
+
+    for connection_id in resumed:
+        kinds = by_connection[connection_id]
+        if kinds[:3] != ["setup", "setupComplete", "clientContent"]:
+            failures.append(f"resumed connection did not wait for setupComplete before history: {kinds[:3]}")
+        if "realtimeInput" not in kinds:
+            failures.append("no audio reached a resumed connection")
+    return failures
+
+
+async def run_check(drop_after: float, seconds: float, port: int) -> List[str]:
+    # Imported here so SSL_CERT_FILE is set before anything creates an SSL context
+    from gemini_resilience import ResilientGeminiLiveLLMService
+
+    events: List[Tuple[str, str]] = []
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_certificate(directory)
+        os.environ["SSL_CERT_FILE"] = certfile
+        server_ssl = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_ssl.load_cert_chain(certfile, keyfile)
+
+        async with websockets.serve(
+            lambda ws: handle_connection(ws, drop_after, events, setup_delay=SETUP_DELAY_SECS), "localhost", port, ssl=server_ssl
+        ):
+            llm = ResilientGeminiLiveLLMService(api_key="standin", base_url=f"localhost:{port}")
+            task = PipelineTask(Pipeline([llm]), PipelineParams(allow_interruptions=True))
+            runner = PipelineRunner(handle_sigint=False)
+
+            async def feed_audio():
+                for _ in range(int(seconds / 0.02)):
+                    await task.queue_frame(InputAudioRawFrame(audio=SILENCE, sample_rate=16000, num_channels=1))
+                    await asyncio.sleep(0.02)
+                await task.queue_frame(EndFrame())
+
+            await asyncio.gather(runner.run(task), feed_audio())
+
+    metrics = llm.reconnect_metrics()
+    logger.info(f"Stand-in saw {len(events)} messages, reconnect metrics {metrics}")
+    return check_events(events, metrics["reconnect_count"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Gemini reconnection against the local stand-in")
+    parser.add_argument("--drop-after", type=float, default=2.0, help="Seconds before the stand-in drops each connection")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Seconds of audio to send")
+    parser.add_argument("--port", type=int, default=8766, help="Stand-in port")
+    args = parser.parse_args()
+
+    failures = asyncio.run(run_check(args.drop_after, args.seconds, args.port))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Turn-Taking Metrics
+
+Measures how well the bot's turn-taking fits the user, to decide whether a
+smarter end-of-turn is worth building. With Gemini Multimodal Live, when the
+bot answers is decided by Gemini's own server-side VAD on the streamed audio.
+The pipecat 0.0.52 Gemini service does not expose manual activity detection,
+so a pipecat processor cannot make Gemini answer sooner or later; holding the
+user's stop would only delay transcription and RTVI events. This module
+therefore only observes. Per session it logs:
+- Median response gap: end of user speech to the bot starting to speak
+- Premature responses: the bot started before EndpointPolicy would have ended
+  the turn, i.e. while the user sounded mid-thought
+- False interrupts: the user kept talking right after the bot started
+
+EndpointPolicy is the adaptive end-of-turn rule that would be used if the
+turn boundary could be driven from here, using:
+- Sentence-final cues in the streaming user transcription
+- Trailing filler words and conjunctions ("um", "and", "because", ...)
+- Pause lengths learned from this user within the session
+
+The monitor goes right after `transport.input()`, where it sees VAD frames,
+Daily transcriptions and, upstream, the bot's speaking events. Every frame is
+passed through unchanged.
+"""
+
+import os
+import re
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+# Silence VAD needs before it reports the user stopped
+VAD_STOP_SECS = float(os.getenv("VAD_STOP_SECS", "0.5"))
+
+# Extra wait after VAD stop, by how finished the user sounds
+MIN_WAIT_SECS = float(os.getenv("ENDPOINT_MIN_WAIT_SECS", "0.05"))
+DEFAULT_WAIT_SECS = float(os.getenv("ENDPOINT_DEFAULT_WAIT_SECS", "0.4"))
+MAX_WAIT_SECS = float(os.getenv("ENDPOINT_MAX_WAIT_SECS", "1.5"))
+
+# Speech resuming this soon after the bot started counts as a false interrupt
+FALSE_INTERRUPT_WINDOW_SECS = 1.0
+
+FILLER_ENDINGS = {
+    "um", "uh", "erm", "hmm", "like", "so", "and", "but", "or", "because",
+    "cause", "if", "then", "that", "the", "a", "to", "i", "mean", "know",
+}
+
+_SENTENCE_FINAL = re.compile(r"[.!?]['\")\]]*$")
+_WORD = re.compile(r"[a-z']+")
+
+
+class EndpointPolicy:
+    """Decides how long to keep waiting after VAD reports the user stopped.
+
+    Waits are measured from the VAD stop, so they come on top of VAD_STOP_SECS.
+    """
+
+    def __init__(
+        self,
+        min_wait: float = MIN_WAIT_SECS,
+        default_wait: float = DEFAULT_WAIT_SECS,
+        max_wait: float = MAX_WAIT_SECS,
+    ):
+        self.min_wait = min_wait
+        self.default_wait = default_wait
+        self.max_wait = max_wait
+        # Pauses after which this user kept talking (measured from VAD stop)
+        self.pauses: List[float] = []
+
+    def learned_wait(self) -> float:
+        """Wait long enough to cover most of the mid-thought pauses seen so far."""
+        if len(self.pauses) < 3:
+            return self.default_wait
+        ordered = sorted(self.pauses)
+        p80 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.8))]
+        return min(self.max_wait, max(self.default_wait, p80 + 0.1))
+
+    def wait_for(self, transcript: str) -> float:
+        text = transcript.strip().lower()
+        words = _WORD.findall(text)
+
+        if words and words[-1] in FILLER_ENDINGS:
+            return self.max_wait
+        if _SENTENCE_FINAL.search(text):
+            # Still trust punctuation, but less so for users who pause mid-thought
+            if len(self.pauses) < 3:
+                return self.min_wait
+            return max(self.min_wait, self.learned_wait() / 2)
+        return self.learned_wait()
+
+    def record_pause(self, seconds: float):
+        self.pauses.append(seconds)
+
+
+class TurnTakingMonitor(FrameProcessor):
+    """Measures response gaps, premature responses and false interrupts."""
+
+    def __init__(self, policy: Optional[EndpointPolicy] = None):
+        super().__init__()
+        self._policy = policy or EndpointPolicy()
+        self._transcript = ""
+        # When VAD reported the user stopped, and how long the policy would have waited
+        self._stopped_at: Optional[float] = None
+        self._policy_wait = 0.0
+        self._bot_started_at: Optional[float] = None
+        self._awaiting_bot = False
+
+        self._turns = 0
+        self._premature_responses = 0
+        self._false_interrupts = 0
+        self._response_gaps: List[float] = []
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "turns": self._turns,
+            "premature_responses": self._premature_responses,
+            "false_interrupts": self._false_interrupts,
+            "false_interrupt_rate": self._false_interrupts / self._turns if self._turns else 0.0,
+            "median_response_gap": statistics.median(self._response_gaps) if self._response_gaps else 0.0,
+            "learned_wait": self._policy.learned_wait(),
+        }
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InterimTranscriptionFrame):
+            self._transcript = frame.text
+        elif isinstance(frame, TranscriptionFrame):
+            self._transcript = frame.text
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._on_user_stopped()
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            self._on_user_started()
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self._on_bot_started()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            logger.info(f"Turn-taking metrics: {self.metrics()}")
+
+        await self.push_frame(frame, direction)
+
+    def _on_user_stopped(self):
+        self._stopped_at = time.monotonic()
+        self._policy_wait = self._policy.wait_for(self._transcript)
+        self._transcript = ""
+        self._awaiting_bot = True
+
+    def _on_user_started(self):
+        now = time.monotonic()
+        if self._awaiting_bot and self._stopped_at is not None:
+            # The user resumed before the bot answered: a mid-thought pause
+            self._policy.record_pause(now - self._stopped_at)
+            self._awaiting_bot = False
+        elif self._bot_started_at is not None and now - self._bot_started_at <= FALSE_INTERRUPT_WINDOW_SECS:
+            # The bot answered while the user still had more to say
+            self._false_interrupts += 1
+            if self._stopped_at is not None:
+                self._policy.record_pause(now - self._stopped_at)
+        self._bot_started_at = None
+
+    def _on_bot_started(self):
+        if not self._awaiting_bot:
+            return
+        self._awaiting_bot = False
+        self._turns += 1
+        self._bot_started_at = time.monotonic()
+        since_stop = self._bot_started_at - self._stopped_at
+        # VAD reports the stop VAD_STOP_SECS after the user actually went quiet
+        self._response_gaps.append(since_stop + VAD_STOP_SECS)
+        if since_stop < self._policy_wait:
+            self._premature_responses += 1
@@ -0,0 +1,244 @@
+"""
+Gemini Live Reconnection
+
+Keeps a practice session alive when the Gemini Multimodal Live websocket drops.
+Instead of failing the whole pipeline, the service:
+- Detects the upstream disconnect (receive loop ends or a send fails)
+- Reconnects with bounded exponential backoff
+- Rehydrates the new Gemini session from a compacted copy of the conversation
+  context plus the practice analytics tracked so far
+- Buffers the user's audio and tool results while reconnecting and replays
+  them afterwards
+- Reports reconnect count and duration
+
+Set GEMINI_BASE_URL to point the service at a local stand-in
+(see gemini_standin.py) to exercise this without the real API, or run
+check_gemini_resilience.py, which does that end to end.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import ErrorFrame
+from pipecat.services.gemini_multimodal_live.gemini import GeminiMultimodalLiveLLMService
+
+# Backoff between reconnect attempts
+RECONNECT_BASE_DELAY_SECS = 0.5
+RECONNECT_MAX_DELAY_SECS = 8.0
+RECONNECT_MAX_ATTEMPTS = 6
+
+# Roughly 10 seconds of 16 kHz audio in 20 ms chunks
+MAX_BUFFERED_AUDIO_MESSAGES = 500
+
+# How long a new session may take to acknowledge setup before history is replayed
+SETUP_TIMEOUT_SECS = 10.0
+
+# How much of the conversation is replayed into a fresh session
+RESUME_MAX_MESSAGES = 12
+RESUME_MAX_MESSAGE_CHARS = 600
+
+
+def compact_history(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert the tail of an OpenAI-style context into Gemini turns."""
+    turns = []
+    for message in messages:
+        role = message.get("role")
+        if role not in ("user", "assistant"):
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        if not content:
+            continue
+        text = content if len(content) <= RESUME_MAX_MESSAGE_CHARS else content[:RESUME_MAX_MESSAGE_CHARS] + "..."
+        turns.append({"role": "user" if role == "user" else "model", "parts": [{"text": text}]})
+    return turns[-RESUME_MAX_MESSAGES:]
+
+
+def summarize_practice_state(conversation_data: Dict[str, Any]) -> str:
+    """Short summary of the practice_tools analytics for a resumed session."""
+    parts = []
+    quality = conversation_data.get("quality_tracking", [])
+    if quality:
+        last = quality[-1]
+        parts.append(f"last tone {last.get('tone')}, clarity {last.get('clarity')}/10")
+    milestones = conversation_data.get("milestones", [])
+    if milestones:
+        parts.append("milestones so far: " + ", ".join(m.get("type", "") for m in milestones[-5:]))
+    emotions = conversation_data.get("emotional_tracking", [])
+    if emotions:
+        parts.append(f"user currently {emotions[-1].get('user_emotion')}")
+    goal_progress = conversation_data.get("goal_progress", [])
+    if goal_progress:
+        parts.append(f"goal alignment {goal_progress[-1].get('goal_alignment')}/10")
+    return "; ".join(parts)
+
+
+class ResilientGeminiLiveLLMService(GeminiMultimodalLiveLLMService):
+    """Gemini Multimodal Live service that reconnects and resumes after a drop."""
+
+    def __init__(self, *, practice_state: Optional[Callable[[], Dict[str, Any]]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._practice_state = practice_state
+        self._closing = False
+        self._reconnecting = False
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._audio_buffer: deque = deque(maxlen=MAX_BUFFERED_AUDIO_MESSAGES)
+        # Tool results that couldn't be sent; their call IDs die with the old session
+        self._pending_tool_results: List[Dict[str, Any]] = []
+        self._receive_ended = False
+
+        self.reconnect_count = 0
+        self.reconnect_durations: List[float] = []
+
+    def reconnect_metrics(self) -> Dict[str, Any]:
+        return {
+            "reconnect_count": self.reconnect_count,
+            "reconnect_total_secs": sum(self.reconnect_durations),
+            "reconnect_max_secs": max(self.reconnect_durations, default=0.0),
+        }
+
+    async def _disconnect(self):
+        self._closing = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+            self._reconnect_task = None
+        await super()._disconnect()
+
+    async def _receive_task_handler(self):
+        await super()._receive_task_handler()
+        # The receive loop only ends on its own when the websocket closed
+        self._receive_ended = True
+        self._schedule_reconnect("receive loop ended")
+
+    async def _tool_result(self, tool_result_message):
+        # The base class writes to the websocket directly, which fails (and loses
+        # the result) while reconnecting; send it like everything else
+        result = json.loads(tool_result_message.get("content") or "")
+        await self._ws_send(
+            {
+                "toolResponse": {
+                    "functionResponses": [
+                        {
+                            "id": tool_result_message.get("tool_call_id"),
+                            "name": tool_result_message.get("tool_call_name"),
+                            "response": {"result": result},
+                        }
+                    ]
+                }
+            }
+        )
+
+    def _buffer(self, message):
+        if "realtimeInput" in message:
+            self._audio_buffer.append(message)
+        elif "toolResponse" in message:
+            self._pending_tool_results.extend(message["toolResponse"]["functionResponses"])
+
+    async def _ws_send(self, message):
+        # User audio and tool results wait while reconnecting, until the new
+        # session has its history. Setup and other control messages go straight
+        # out so reconnecting can complete.
+        if self._reconnecting and ("realtimeInput" in message or "toolResponse" in message):
+            self._buffer(message)
+            return
+        if not self._websocket and not self._reconnecting:
+            # Like the base service, connect lazily on the first send
+            await self._connect()
+            if not self._websocket:
+                self._buffer(message)
+                self._schedule_reconnect("initial connect failed")
+                return
+        if not self._websocket:
+            return
+        try:
+            await self._websocket.send(json.dumps(message))
+        except Exception as e:
+            if self._closing:
+                return
+            self._buffer(message)
+            self._schedule_reconnect(f"send failed: {e}")
+
+    def _schedule_reconnect(self, reason: str):
+        if self._closing or self._reconnecting:
+            return
+        logger.warning(f"{self} lost Gemini connection ({reason}), reconnecting")
+        self._reconnecting = True
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        started = time.monotonic()
+        try:
+            for attempt in range(RECONNECT_MAX_ATTEMPTS):
+                # Tear down what is left of the old connection before opening a new one
+                await super()._disconnect()
+                self._api_session_ready = False
+                self._receive_ended = False
+                await super()._connect()
+                if await self._resume_when_ready():
+                    break
+                delay = min(RECONNECT_MAX_DELAY_SECS, RECONNECT_BASE_DELAY_SECS * 2**attempt)
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            else:
+                await self.push_error(
+                    ErrorFrame(error=f"Gemini reconnect failed after {RECONNECT_MAX_ATTEMPTS} attempts", fatal=True)
+                )
+                return
+
+            duration = time.monotonic() - started
+            self.reconnect_count += 1
+            self.reconnect_durations.append(duration)
+            logger.info(f"{self} reconnected in {duration:.2f}s (reconnect #{self.reconnect_count})")
+        finally:
+            self._reconnecting = False
+            self._reconnect_task = None
+
+    async def _resume_when_ready(self) -> bool:
+        """Resume once the new session acknowledged setup; False if this attempt failed."""
+        # Content sent before setupComplete is rejected by the API
+        deadline = time.monotonic() + SETUP_TIMEOUT_SECS
+        while not self._api_session_ready:
+            if not self._websocket or self._receive_ended:
+                logger.warning(f"{self} Gemini connection closed before setup completed")
+                return False
+            if time.monotonic() >= deadline:
+                logger.warning(f"{self} Gemini did not acknowledge setup within {SETUP_TIMEOUT_SECS:.0f}s")
+                return False
+            await asyncio.sleep(0.05)
+        try:
+            await self._resume_session()
+        except Exception as e:
+            logger.warning(f"{self} Gemini connection failed while resuming: {e}")
+            return False
+        return True
+
+    async def _resume_session(self):
+        """Replay the compacted conversation, tool results and audio buffered while offline."""
+        turns = compact_history(self._context.messages) if self._context else []
+
+        practice_summary = summarize_practice_state(self._practice_state()) if self._practice_state else ""
+        note = "The call briefly dropped and has resumed. Continue the conversation in character without mentioning it."
+        if practice_summary:
+            note += f" Practice tracking so far: {practice_summary}."
+        turns.insert(0, {"role": "user", "parts": [{"text": note}]})
+
+        # The new session doesn't know the old call IDs, so pass results as context
+        for response in self._pending_tool_results:
+            result = json.dumps(response.get("response", {}).get("result"), default=str)
+            turns.append({"role": "user", "parts": [{"text": f"Result of {response.get('name')} before the drop: {result}"}]})
+
+        await self._websocket.send(json.dumps({"clientContent": {"turns": turns, "turnComplete": False}}))
+        self._pending_tool_results = []
+
+        while self._audio_buffer:
+            await self._websocket.send(json.dumps(self._audio_buffer.popleft()))
@@ -0,0 +1,100 @@
+"""
+Gemini Live Stand-in
+
+A local websocket server that speaks just enough of the Gemini Multimodal Live
+protocol to exercise reconnection (see gemini_resilience.py). It acknowledges
+setup, answers completed turns with a canned text reply, swallows realtime
+audio, and drops every connection after a configurable time.
+
+The bot always connects over wss://, so serve with a certificate the bot trusts:
+
+    openssl req -x509 -newkey rsa:2048 -nodes -subj /CN=localhost \\
+        -keyout standin.key -out standin.crt
+    python gemini_standin.py --certfile standin.crt --keyfile standin.key --drop-after 20
+    GEMINI_BASE_URL=localhost:8765 SSL_CERT_FILE=standin.crt python bot-gemini.py ...
+
+check_gemini_resilience.py runs the same setup as an automated check.
+"""
+
+import argparse
+import asyncio
+import json
+import ssl
+from typing import List, Optional, Tuple
+
+import websockets
+from loguru import logger
+
+
+async def handle_connection(
+    websocket, drop_after: float, events: Optional[List[Tuple[str, str]]] = None, setup_delay: float = 0.0
+):
+    """Serve one connection.
+
+    Every message kind received, and each setupComplete sent, is appended to
+    events as (connection_id, kind). setup_delay holds back setupComplete like
+    a slow session start.
+    """
+    connection_id = str(websocket.id)
+    logger.info(f"Stand-in connection {connection_id} opened")
+    audio_messages = 0
+
+    async def serve():
+        nonlocal audio_messages
+        async for raw in websocket:
+            message = json.loads(raw)
+            if events is not None:
+                events.append((connection_id, next(iter(message), "")))
+            if "setup" in message:
+                await asyncio.sleep(setup_delay)
+                await websocket.send(json.dumps({"setupComplete": {}}))
+                if events is not None:
+                    events.append((connection_id, "setupComplete"))
+            elif "realtimeInput" in message:
+                audio_messages += 1
+            elif "clientContent" in message:
+                turns = message["clientContent"].get("turns", [])
+                logger.info(f"Stand-in {connection_id} received {len(turns)} history turns")
+                if message["clientContent"].get("turnComplete"):
+                    reply = {
+                        "serverContent": {
+                            "modelTurn": {"parts": [{"text": "Okay, I'm listening."}]},
+                            "turnComplete": True,
+                        }
+                    }
+                    await websocket.send(json.dumps(reply))
+
+    try:
+        await asyncio.wait_for(serve(), timeout=drop_after)
+    except asyncio.TimeoutError:
+        logger.info(f"Stand-in dropping connection {connection_id} after {drop_after}s")
+        # Abort rather than close cleanly, like a network failure would
+        websocket.transport.abort()
+    finally:
+        logger.info(f"Stand-in connection {connection_id} ended ({audio_messages} audio messages)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local Gemini Live stand-in")
+    parser.add_argument("--host", type=str, default="localhost", help="Host address")
+    parser.add_argument("--port", type=int, default=8765, help="Port number")
+    parser.add_argument("--drop-after", type=float, default=30.0, help="Seconds before each connection is dropped")
+    parser.add_argument("--setup-delay", type=float, default=0.0, help="Seconds before acknowledging setup")
+    parser.add_argument("--certfile", type=str, required=False, help="TLS certificate (needed for wss://)")
+    parser.add_argument("--keyfile", type=str, required=False, help="TLS private key")
+    args = parser.parse_args()
+
+    ssl_context = None
+    if args.certfile:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(args.certfile, args.keyfile)
+
+    async with websockets.serve(
+        lambda ws: handle_connection(ws, args.drop_after, setup_delay=args.setup_delay), args.host, args.port, ssl=ssl_context
+    ):
+        logger.info(f"Gemini stand-in listening on {args.host}:{args.port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
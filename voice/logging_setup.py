@@ -0,0 +1,163 @@
+"""
+Structured Logging
+
+Shared loguru setup for the voice server and bots. Under many concurrent sessions,
+writes to stderr block the event loop, so this configures:
+- A background writer: each record is formatted on the logging thread, and the
+  line is handed to a writer thread through a queue.SimpleQueue. (Loguru's own
+  `enqueue=True` pickles every record on the calling thread, which stalled the
+  loop about 6x more than writing synchronously.)
+- JSON output (one object per line), or plain text with LOG_FORMAT=text
+- Per-session context (service, session_id, room_url) attached to every record
+- Sampling: DEBUG and below are kept at LOG_DEBUG_SAMPLE_RATE (10% by default,
+  set it to 1.0 to keep every record), and records bound with an `event` key are
+  limited to LOG_EVENT_RATE per second per event. WARNING and above are never
+  sampled.
+
+Usage:
+    setup_logging("bot", session_id=session_id)
+    logger.bind(event="practice_tool").info("...")
+
+See bench_logging.py for the event-loop stall benchmark. Writing to a local file
+is cheap next to formatting a record, so there the background writer is about
+even with writing synchronously; it matters when stderr blocks (a full pipe or
+a slow log driver). Sampling is what keeps stalls near the no-logging baseline,
+so keeping every DEBUG record (LOG_DEBUG_SAMPLE_RATE=1.0) is only meant for
+debugging.
+"""
+
+import asyncio
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+from loguru import logger
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_EVENT_RATE = int(os.getenv("LOG_EVENT_RATE", "20"))
+
+# Fields attached to every record, see set_log_context()
+_context: Dict[str, Any] = {}
+
+_INFO_LEVEL = logger.level("INFO").no
+_WARNING_LEVEL = logger.level("WARNING").no
+
+
+class LogSampler:
+    """Loguru filter that samples low-level records and rate-limits bound events."""
+
+    def __init__(self, debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE, event_rate: int = LOG_EVENT_RATE):
+        self._debug_sample_rate = debug_sample_rate
+        self._event_rate = event_rate
+        # event -> [window start, records kept, records dropped]
+        self._windows: Dict[str, List[Any]] = {}
+
+    def __call__(self, record) -> bool:
+        level = record["level"].no
+        if level >= _WARNING_LEVEL:
+            return True
+        if level < _INFO_LEVEL and self._debug_sample_rate < 1.0 and random.random() >= self._debug_sample_rate:
+            return False
+
+        event = record["extra"].get("event")
+        if event is None or self._event_rate <= 0:
+            return True
+
+        now = time.monotonic()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= 1.0:
+            # New one-second window; report how many were dropped in the last one
+            if window and window[2]:
+                record["extra"]["sampled_out"] = window[2]
+            self._windows[event] = [now, 1, 0]
+            return True
+        if window[1] < self._event_rate:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class BackgroundWriter:
+    """File-like loguru sink that writes lines from a daemon thread.
+
+    Loguru calls stop() when the handler is removed and awaits complete() from
+    `logger.complete()`.
+    """
+
+    def __init__(self, stream):
+        # A path opens a file the writer owns; a stream (e.g. sys.stderr) is left open
+        self._owns_stream = isinstance(stream, (str, os.PathLike))
+        self._stream = open(stream, "a", buffering=1) if self._owns_stream else stream
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        self._queue.put(str(message))
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._owns_stream:
+            self._stream.close()
+
+    async def complete(self):
+        """Wait until every line queued so far has been written."""
+        done = threading.Event()
+        self._queue.put(done)
+        await asyncio.to_thread(done.wait)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            else:
+                self._stream.write(item)
+            if self._queue.empty():
+                self._stream.flush()
+        self._stream.flush()
+
+
+def setup_logging(
+    service: str,
+    sink=sys.stderr,
+    level: str = LOG_LEVEL,
+    format: str = LOG_FORMAT,
+    debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE,
+    event_rate: int = LOG_EVENT_RATE,
+    background: bool = True,
+    **context,
+):
+    """Replace the default loguru handler with the structured, non-blocking one.
+
+    The settings default to the LOG_* environment variables; a debug_sample_rate
+    of 1.0 and an event_rate of 0 turn sampling off. background=False writes
+    on the logging thread instead (used by the benchmark).
+    """
+    logger.remove()
+    _context.clear()
+    _context.update(service=service, **context)
+    logger.configure(extra=dict(_context))
+    logger.add(
+        BackgroundWriter(sink) if background else sink,
+        level=level,
+        serialize=format == "json",
+        filter=LogSampler(debug_sample_rate, event_rate),
+    )
+
+
+def set_log_context(**context):
+    """Add per-session fields (e.g. session_id, room_url) to every following record."""
+    # logger.configure replaces the extra dict, so carry over what was already set
+    _context.update(context)
+    logger.configure(extra=dict(_context))
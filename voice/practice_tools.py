@@ -9,9 +9,14 @@ import json
 from datetime import datetime
 from typing import Dict, Any
 
+from loguru import logger
+
 # In-memory storage for conversation analytics (could be replaced with database)
 conversation_data = {}
 
+# Tool calls are high-frequency; the event key lets the log sampler rate-limit them
+tool_logger = logger.bind(event="practice_tool")
+
 
 def track_communication_quality(
     tone: str,
@@ -37,7 +42,7 @@ def track_communication_quality(
         conversation_data["quality_tracking"] = []
     conversation_data["quality_tracking"].append(quality_data)
     
-    print(f"[QUALITY TRACKED] Tone: {tone}, Clarity: {clarity}/10, Empathy: {empathy_shown}, Listening: {listening_quality}/10")
+    tool_logger.info(f"[QUALITY TRACKED] Tone: {tone}, Clarity: {clarity}/10, Empathy: {empathy_shown}, Listening: {listening_quality}/10")
     
     return {
         "status": "tracked",
@@ -66,7 +71,7 @@ def log_conversation_milestone(
         conversation_data["milestones"] = []
     conversation_data["milestones"].append(milestone)
     
-    print(f"[MILESTONE] {milestone_type}: {description} (Quality: {user_response_quality})")
+    tool_logger.info(f"[MILESTONE] {milestone_type}: {description} (Quality: {user_response_quality})")
     
     return {
         "status": "logged",
@@ -96,7 +101,7 @@ def assess_goal_progress(
         conversation_data["goal_progress"] = []
     conversation_data["goal_progress"].append(assessment)
     
-    print(f"[GOAL PROGRESS] Alignment: {goal_alignment}/10 - {progress_notes}")
+    tool_logger.info(f"[GOAL PROGRESS] Alignment: {goal_alignment}/10 - {progress_notes}")
     
     return {
         "status": "assessed",
@@ -126,7 +131,7 @@ def detect_emotional_state(
         conversation_data["emotional_tracking"] = []
     conversation_data["emotional_tracking"].append(emotional_data)
     
-    print(f"[EMOTIONS] User: {user_emotion}, Persona: {persona_emotion}, Shift: {emotional_shift}")
+    tool_logger.info(f"[EMOTIONS] User: {user_emotion}, Persona: {persona_emotion}, Shift: {emotional_shift}")
     
     return {
         "status": "detected",
@@ -155,7 +160,7 @@ def suggest_conversation_technique(
         conversation_data["technique_suggestions"] = []
     conversation_data["technique_suggestions"].append(suggestion)
     
-    print(f"[TECHNIQUE SUGGESTION] {technique} ({priority} priority) - {situation}")
+    tool_logger.info(f"[TECHNIQUE SUGGESTION] {technique} ({priority} priority) - {situation}")
     
     return {
         "status": "noted",
@@ -185,7 +190,7 @@ def evaluate_conversation_ending(
     
     conversation_data["ending_evaluation"] = evaluation
     
-    print(f"[CONVERSATION END] Quality: {ending_quality}, Goal Achieved: {goal_achieved}, Impact: {relationship_impact}")
+    tool_logger.info(f"[CONVERSATION END] Quality: {ending_quality}, Goal Achieved: {goal_achieved}, Impact: {relationship_impact}")
     
     return {
         "status": "evaluated",
@@ -224,9 +229,10 @@ def generate_feedback_summary(
     
     conversation_data["final_feedback"] = feedback
     
-    print(f"[FEEDBACK GENERATED] Overall Score: {overall_score}/10")
-    print(f"Strengths: {strengths}")
-    print(f"Areas for Improvement: {areas_for_improvement}")
+    tool_logger.info(
+        f"[FEEDBACK GENERATED] Overall Score: {overall_score}/10. "
+        f"Strengths: {strengths}. Areas for Improvement: {areas_for_improvement}"
+    )
     
     return {
         "status": "generated",
@@ -271,4 +277,4 @@ def reset_conversation_data():
     """Reset conversation data for new session."""
     global conversation_data
     conversation_data = {}
-    print("[RESET] Conversation data cleared for new session")
+    tool_logger.info("[RESET] Conversation data cleared for new session")
@@ -0,0 +1,353 @@
+"""
+Session Recorder
+
+Records a practice session into a compact, append-only segment file so it can be
+inspected or replayed offline (see replay.py). A recording contains:
+- Input (user) and output (bot) PCM audio
+- User and bot transcripts
+- Tool calls and their results
+- Speaking events, all stamped with their time since the session started
+
+File layout (little-endian):
+
+    header   "DREC" | version u16 | reserved u16 | started_at f64
+    record   length u32 | kind u8 | pad u8 | turn u32 | timestamp f64 | payload
+    ...
+    index    an INDEX record mapping each turn to its first/last byte offset
+    trailer  "DIDX" | index offset u64
+
+Records are only ever appended. The index and trailer are written when the
+recording is closed; if a bot dies before that, the reader rebuilds the index by
+scanning the records. Readers memory-map the file, so opening a long recording
+is cheap and a single turn can be pulled out without reading the rest.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    Frame,
+    FunctionCallInProgressFrame,
+    FunctionCallResultFrame,
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    TextFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+MAGIC = b"DREC"
+INDEX_MAGIC = b"DIDX"
+VERSION = 1
+
+_FILE_HEADER = struct.Struct("<4sHHd")
+_RECORD_HEADER = struct.Struct("<IBxId")
+_AUDIO_HEADER = struct.Struct("<IH")
+_INDEX_ENTRY = struct.Struct("<IQQ")
+_TRAILER = struct.Struct("<4sQ")
+
+
+class RecordKind(IntEnum):
+    """Kinds of records stored in a session recording."""
+
+    INPUT_AUDIO = 1
+    OUTPUT_AUDIO = 2
+    USER_TRANSCRIPT = 3
+    BOT_TRANSCRIPT = 4
+    TOOL_CALL = 5
+    TOOL_RESULT = 6
+    EVENT = 7
+    INDEX = 255
+
+
+class Record(NamedTuple):
+    """A single record read back from a recording."""
+
+    kind: RecordKind
+    turn: int
+    timestamp: float
+    payload: bytes
+
+    def audio(self) -> Tuple[int, int, bytes]:
+        """Return (sample_rate, num_channels, pcm) for an audio record."""
+        sample_rate, num_channels = _AUDIO_HEADER.unpack_from(self.payload)
+        return sample_rate, num_channels, self.payload[_AUDIO_HEADER.size :]
+
+    def json(self) -> Dict[str, Any]:
+        """Decode the payload of a transcript, tool or event record."""
+        return json.loads(self.payload.decode("utf-8"))
+
+
+class SessionRecordingWriter:
+    """Append-only writer for a session recording file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "xb")
+        self._started = time.monotonic()
+        self._turn = 0
+        self._offset = 0
+        self._turn_spans: Dict[int, List[int]] = {}
+        self._closed = False
+
+        self._write(_FILE_HEADER.pack(MAGIC, VERSION, 0, time.time()))
+
+    @property
+    def turn(self) -> int:
+        return self._turn
+
+    def next_turn(self) -> int:
+        """Start a new turn; subsequent records are indexed under it."""
+        self._turn += 1
+        return self._turn
+
+    def append(self, kind: RecordKind, payload: bytes):
+        """Append a record stamped with the current turn and session time."""
+        if self._closed:
+            return
+        timestamp = time.monotonic() - self._started
+        offset = self._offset
+        self._write(_RECORD_HEADER.pack(len(payload), kind, self._turn, timestamp))
+        self._write(payload)
+
+        span = self._turn_spans.get(self._turn)
+        if span is None:
+            self._turn_spans[self._turn] = [offset, self._offset]
+        else:
+            span[1] = self._offset
+
+    def append_audio(self, kind: RecordKind, audio: bytes, sample_rate: int, num_channels: int):
+        self.append(kind, _AUDIO_HEADER.pack(sample_rate, num_channels) + audio)
+
+    def append_json(self, kind: RecordKind, data: Dict[str, Any]):
+        self.append(kind, json.dumps(data, default=str).encode("utf-8"))
+
+    def flush(self):
+        if not self._closed:
+            self._file.flush()
+
+    def close(self):
+        """Write the turn index and trailer, then close the file."""
+        if self._closed:
+            return
+        index = b"".join(
+            _INDEX_ENTRY.pack(turn, start, end) for turn, (start, end) in self._turn_spans.items()
+        )
+        index_offset = self._offset
+        timestamp = time.monotonic() - self._started
+        self._write(_RECORD_HEADER.pack(len(index), RecordKind.INDEX, self._turn, timestamp))
+        self._write(index)
+        self._write(_TRAILER.pack(INDEX_MAGIC, index_offset))
+        self._file.close()
+        self._closed = True
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._offset += len(data)
+
+
+class SessionRecording:
+    """Memory-mapped, read-only view of a session recording."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, started_at = _FILE_HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        if version != VERSION:
+            raise ValueError(f"Unsupported recording version {version} in {path}")
+        self.started_at = started_at
+
+        self._end = len(self._mmap)
+        self._index = self._read_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    @property
+    def turns(self) -> List[int]:
+        return sorted(self._index)
+
+    def records(self, turn: Optional[int] = None) -> Iterator[Record]:
+        """Iterate over all records, or only those of a single turn."""
+        if turn is None:
+            return self._scan(_FILE_HEADER.size, self._end)
+        span = self._index.get(turn)
+        if span is None:
+            return iter(())
+        return self._scan(*span)
+
+    def duration(self) -> float:
+        last = 0.0
+        for record in self.records():
+            last = record.timestamp
+        return last
+
+    def _read_index(self) -> Dict[int, Tuple[int, int]]:
+        if self._end >= _FILE_HEADER.size + _TRAILER.size:
+            magic, index_offset = _TRAILER.unpack_from(self._mmap, self._end - _TRAILER.size)
+            if magic == INDEX_MAGIC:
+                length = _RECORD_HEADER.unpack_from(self._mmap, index_offset)[0]
+                start = index_offset + _RECORD_HEADER.size
+                self._end = index_offset
+                return {
+                    turn: (first, last)
+                    for turn, first, last in _INDEX_ENTRY.iter_unpack(self._mmap[start : start + length])
+                }
+
+        # No trailer: the recording was not closed cleanly, so rebuild the index
+        logger.warning(f"Recording {self.path} has no index, rebuilding it")
+        index: Dict[int, Tuple[int, int]] = {}
+        offset = _FILE_HEADER.size
+        while offset + _RECORD_HEADER.size <= self._end:
+            length, _, turn, _ = _RECORD_HEADER.unpack_from(self._mmap, offset)
+            next_offset = offset + _RECORD_HEADER.size + length
+            if next_offset > self._end:
+                break
+            first = index[turn][0] if turn in index else offset
+            index[turn] = (first, next_offset)
+            offset = next_offset
+        self._end = offset
+        return index
+
+    def _scan(self, start: int, end: int) -> Iterator[Record]:
+        offset = start
+        while offset + _RECORD_HEADER.size <= end:
+            length, kind, turn, timestamp = _RECORD_HEADER.unpack_from(self._mmap, offset)
+            payload_start = offset + _RECORD_HEADER.size
+            if payload_start + length > end:
+                break
+            yield Record(RecordKind(kind), turn, timestamp, self._mmap[payload_start : payload_start + length])
+            offset = payload_start + length
+
+
+class _RecorderTap(FrameProcessor):
+    """Pipeline processor that copies the frames it sees into a recording."""
+
+    def __init__(self, recorder: "SessionRecorder", is_output: bool):
+        super().__init__()
+        self._recorder = recorder
+        self._is_output = is_output
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if self._is_output:
+            self._recorder.record_output(frame)
+        else:
+            self._recorder.record_input(frame)
+
+        if isinstance(frame, (EndFrame, CancelFrame)):
+            if self._is_output:
+                self._recorder.close()
+            else:
+                self._recorder.flush()
+
+        await self.push_frame(frame, direction)
+
+
+class SessionRecorder:
+    """Optional recorder for the bot pipeline.
+
+    Like the transport, it contributes two processors: `input()` goes right after
+    `transport.input()` to capture user audio and speaking events, and `output()`
+    goes right after the LLM to capture bot audio, transcripts and tool calls.
+    """
+
+    def __init__(self, path: str):
+        self._writer = SessionRecordingWriter(path)
+        self._input = _RecorderTap(self, is_output=False)
+        self._output = _RecorderTap(self, is_output=True)
+        logger.info(f"Recording session to {path}")
+
+    @classmethod
+    def from_env(cls, session_id: str) -> Optional["SessionRecorder"]:
+        """Create a recorder if SESSION_RECORDING_DIR is set.
+
+        Sessions can be continued by a later bot, so the file name also carries
+        the bot's pid and start time.
+        """
+        directory = os.getenv("SESSION_RECORDING_DIR")
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        name = f"{session_id}-{os.getpid()}-{int(time.time())}.drec"
+        return cls(os.path.join(directory, name))
+
+    def input(self) -> FrameProcessor:
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        return self._output
+
+    def record_input(self, frame: Frame):
+        """Record user audio and speaking events; a user turn starts a new index entry."""
+        writer = self._writer
+        if isinstance(frame, InputAudioRawFrame):
+            writer.append_audio(RecordKind.INPUT_AUDIO, frame.audio, frame.sample_rate, frame.num_channels)
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            writer.next_turn()
+            writer.append_json(RecordKind.EVENT, {"event": "user_started_speaking"})
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            writer.append_json(RecordKind.EVENT, {"event": "user_stopped_speaking"})
+
+    def record_output(self, frame: Frame):
+        """Record bot audio, transcripts, tool calls and bot speaking events."""
+        writer = self._writer
+        if isinstance(frame, OutputAudioRawFrame):
+            writer.append_audio(RecordKind.OUTPUT_AUDIO, frame.audio, frame.sample_rate, frame.num_channels)
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            writer.append_json(RecordKind.EVENT, {"event": "bot_started_speaking"})
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            writer.append_json(RecordKind.EVENT, {"event": "bot_stopped_speaking"})
+        elif isinstance(frame, TranscriptionFrame):
+            writer.append_json(RecordKind.USER_TRANSCRIPT, {"text": frame.text, "user_id": frame.user_id})
+        elif isinstance(frame, TextFrame):
+            writer.append_json(RecordKind.BOT_TRANSCRIPT, {"text": frame.text})
+        elif isinstance(frame, FunctionCallInProgressFrame):
+            writer.append_json(
+                RecordKind.TOOL_CALL,
+                {
+                    "function_name": frame.function_name,
+                    "tool_call_id": frame.tool_call_id,
+                    "arguments": frame.arguments,
+                },
+            )
+        elif isinstance(frame, FunctionCallResultFrame):
+            writer.append_json(
+                RecordKind.TOOL_RESULT,
+                {
+                    "function_name": frame.function_name,
+                    "tool_call_id": frame.tool_call_id,
+                    "result": frame.result,
+                },
+            )
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
@@ -0,0 +1,327 @@
+"""
+Session Replay
+
+Feeds a session recording (see recorder.py) back through a pipeline so latency
+regressions can be reproduced and pipeline changes benchmarked on real traffic.
+
+The Gemini service is replaced by a local model stand-in that answers each user
+turn with the bot audio and transcripts that were recorded for it. It answers
+once the UserStoppedSpeakingFrame reaches it, after the delay the real model
+took from the recorded stop (or a fixed --response-delay). Latency is measured
+from the raw user stop at the head of the pipeline, so whatever a stage under
+test adds before the model shows up in the "Replayed" numbers.
+
+With --model-vad the stand-in ignores the stop frame that reaches it and
+answers on the recorded timeline from the raw stop, like Gemini Live deciding
+turns with its own server-side VAD. Stages then can't change the latency.
+
+Extra processors under test can be inserted in front of the stand-in with
+--stage module:factory (called with no arguments). A stage's metrics() are
+logged at the end.
+
+Usage:
+    python replay.py recordings/<session_id>-<pid>-<started>.drec [--speed 1.0] [--stage endpointing:TurnTakingMonitor]
+"""
+
+import argparse
+import asyncio
+import importlib
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    EndFrame,
+    Frame,
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+    TextFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from recorder import Record, RecordKind, SessionRecording
+
+
+class LocalModelStandIn(FrameProcessor):
+    """Stands in for the live model by replaying the recorded bot side of each turn."""
+
+    def __init__(
+        self,
+        recording: SessionRecording,
+        speed: float = 1.0,
+        response_delay: Optional[float] = None,
+        model_vad: bool = False,
+    ):
+        super().__init__()
+        self._recording = recording
+        self._speed = speed
+        self._response_delay = response_delay
+        self._model_vad = model_vad
+        self._turn = 0
+        self._response_task: Optional[asyncio.Task] = None
+
+    async def user_started(self, turn: int):
+        """Raw user start (see UserTurnMarker): the user barged in or took a new turn."""
+        self._turn = turn
+        await self._cancel_response()
+
+    async def user_stopped(self, turn: int):
+        """Raw user stop: with model_vad, answer when the recorded model did."""
+        if self._model_vad:
+            self._respond(turn, self._response_delay)
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, StartFrame):
+            await self.push_frame(frame, direction)
+            # The bot usually opens the conversation before the user says anything
+            self._respond(0, None)
+            return
+
+        if isinstance(frame, UserStoppedSpeakingFrame) and not self._model_vad:
+            self._respond(self._turn, self._response_delay)
+        elif isinstance(frame, EndFrame) and self._response_task:
+            # Let the last answer play out before the pipeline shuts down
+            await self._response_task
+
+        await self.push_frame(frame, direction)
+
+    def _respond(self, turn: int, delay: Optional[float]):
+        self._response_task = asyncio.create_task(self._play_turn(turn, delay))
+
+    async def _cancel_response(self):
+        if self._response_task:
+            self._response_task.cancel()
+            try:
+                await self._response_task
+            except asyncio.CancelledError:
+                pass
+            self._response_task = None
+
+    async def _play_turn(self, turn: int, delay: Optional[float]):
+        records = list(self._recording.records(turn))
+        stopped_at = _first_event_time(records, "user_stopped_speaking")
+        outputs = [
+            r
+            for r in records
+            if r.kind in (RecordKind.OUTPUT_AUDIO, RecordKind.USER_TRANSCRIPT, RecordKind.BOT_TRANSCRIPT)
+            and (stopped_at is None or r.timestamp >= stopped_at)
+        ]
+        if not outputs:
+            return
+
+        if delay is None:
+            delay = outputs[0].timestamp - stopped_at if stopped_at is not None else 0.0
+        await self._sleep(delay)
+
+        # There is no output transport here, so tell upstream stages the bot is speaking
+        await self.push_frame(BotStartedSpeakingFrame(), FrameDirection.UPSTREAM)
+        try:
+            previous = outputs[0].timestamp
+            for record in outputs:
+                await self._sleep(record.timestamp - previous)
+                previous = record.timestamp
+                await self.push_frame(_record_to_frame(record))
+        finally:
+            await self.push_frame(BotStoppedSpeakingFrame(), FrameDirection.UPSTREAM)
+
+    async def _sleep(self, seconds: float):
+        if self._speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds / self._speed)
+
+
+class LatencyProbe(FrameProcessor):
+    """Measures the gap between the raw user stop and the first bot audio of each turn."""
+
+    def __init__(self):
+        super().__init__()
+        self._stopped_at: Optional[float] = None
+        self.latencies: List[float] = []
+
+    async def user_started(self, turn: int):
+        self._stopped_at = None
+
+    async def user_stopped(self, turn: int):
+        self._stopped_at = time.monotonic()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OutputAudioRawFrame) and self._stopped_at is not None:
+            self.latencies.append(time.monotonic() - self._stopped_at)
+            self._stopped_at = None
+
+        await self.push_frame(frame, direction)
+
+
+class UserTurnMarker(FrameProcessor):
+    """First processor of the replay pipeline: reports raw user speaking events.
+
+    Stages under test may hold or drop these frames, so the stand-in and the
+    probe take turn numbers and timing from here instead.
+    """
+
+    def __init__(self, listeners):
+        super().__init__()
+        self._listeners = listeners
+        self._turn = 0
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._turn += 1
+            for listener in self._listeners:
+                await listener.user_started(self._turn)
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            for listener in self._listeners:
+                await listener.user_stopped(self._turn)
+
+        await self.push_frame(frame, direction)
+
+
+def _first_event_time(records: List[Record], event: str) -> Optional[float]:
+    for record in records:
+        if record.kind == RecordKind.EVENT and record.json()["event"] == event:
+            return record.timestamp
+    return None
+
+
+def _record_to_frame(record: Record) -> Frame:
+    if record.kind == RecordKind.INPUT_AUDIO:
+        sample_rate, num_channels, audio = record.audio()
+        return InputAudioRawFrame(audio=audio, sample_rate=sample_rate, num_channels=num_channels)
+    if record.kind == RecordKind.OUTPUT_AUDIO:
+        sample_rate, num_channels, audio = record.audio()
+        return OutputAudioRawFrame(audio=audio, sample_rate=sample_rate, num_channels=num_channels)
+    if record.kind == RecordKind.USER_TRANSCRIPT:
+        data = record.json()
+        return TranscriptionFrame(data["text"], data.get("user_id", "user"), "")
+    if record.kind == RecordKind.BOT_TRANSCRIPT:
+        return TextFrame(record.json()["text"])
+    raise ValueError(f"Cannot replay {record.kind.name} records")
+
+
+def recorded_latencies(recording: SessionRecording) -> List[float]:
+    """Latencies (user stopped -> first bot audio) as they happened in the live session."""
+    latencies = []
+    for turn in recording.turns:
+        records = list(recording.records(turn))
+        stopped_at = _first_event_time(records, "user_stopped_speaking")
+        if stopped_at is None:
+            continue
+        for record in records:
+            if record.kind == RecordKind.OUTPUT_AUDIO and record.timestamp >= stopped_at:
+                latencies.append(record.timestamp - stopped_at)
+                break
+    return latencies
+
+
+async def feed_user_side(task: PipelineTask, recording: SessionRecording, speed: float):
+    """Queue the recorded user audio and speaking events at their original pace."""
+    started = time.monotonic()
+    for record in recording.records():
+        if record.kind == RecordKind.INPUT_AUDIO:
+            frame = _record_to_frame(record)
+        elif record.kind == RecordKind.EVENT and record.json()["event"] == "user_started_speaking":
+            frame = UserStartedSpeakingFrame()
+        elif record.kind == RecordKind.EVENT and record.json()["event"] == "user_stopped_speaking":
+            frame = UserStoppedSpeakingFrame()
+        else:
+            continue
+
+        if speed > 0:
+            wait = record.timestamp / speed - (time.monotonic() - started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        await task.queue_frame(frame)
+
+
+def load_stage(spec: str) -> FrameProcessor:
+    module_name, _, factory_name = spec.partition(":")
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    return factory()
+
+
+def summarize(name: str, latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        logger.info(f"{name}: no completed turns")
+        return {}
+    ordered = sorted(latencies)
+    summary = {
+        "turns": len(ordered),
+        "median": statistics.median(ordered),
+        "p90": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        "max": ordered[-1],
+    }
+    logger.info(
+        f"{name}: {summary['turns']} turns, median {summary['median'] * 1000:.0f} ms, "
+        f"p90 {summary['p90'] * 1000:.0f} ms, max {summary['max'] * 1000:.0f} ms"
+    )
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded practice session")
+    parser.add_argument("recording", type=str, help="Path to a .drec session recording")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Playback speed (0 replays as fast as possible)"
+    )
+    parser.add_argument(
+        "--response-delay",
+        type=float,
+        default=None,
+        help="Answer this many seconds after the user stop (default: the recorded delay)",
+    )
+    parser.add_argument(
+        "--model-vad",
+        action="store_true",
+        help="Time answers from the raw user stop, ignoring stages, like Gemini's server-side VAD",
+    )
+    parser.add_argument(
+        "--stage",
+        type=str,
+        action="append",
+        default=[],
+        help="Processor factory to insert before the model stand-in, as module:factory",
+    )
+    args = parser.parse_args()
+
+    with SessionRecording(args.recording) as recording:
+        standin = LocalModelStandIn(
+            recording, speed=args.speed, response_delay=args.response_delay, model_vad=args.model_vad
+        )
+        probe = LatencyProbe()
+        marker = UserTurnMarker([standin, probe])
+        stages = [load_stage(spec) for spec in args.stage]
+
+        task = PipelineTask(Pipeline([marker, *stages, standin, probe]), PipelineParams(allow_interruptions=True))
+        runner = PipelineRunner()
+
+        async def feed():
+            await feed_user_side(task, recording, args.speed)
+            await task.queue_frame(EndFrame())
+
+        await asyncio.gather(runner.run(task), feed())
+
+        summarize("Recorded", recorded_latencies(recording))
+        summarize("Replayed", probe.latencies)
+        for spec, stage in zip(args.stage, stages):
+            if hasattr(stage, "metrics"):
+                logger.info(f"{spec} metrics: {stage.metrics()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,7 @@
 import argparse
 import os
+import re
+import uuid
 
 import aiohttp
 
@@ -8,6 +10,13 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Session IDs end up in file names, so only allow UUID/hex-like IDs
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    return bool(SESSION_ID_PATTERN.match(session_id))
+
 
 async def configure(aiohttp_session: aiohttp.ClientSession):
     """Configure the Daily room and Daily REST helper."""
@@ -29,13 +38,22 @@ async def configure(aiohttp_session: aiohttp.ClientSession):
         required=False,
         help="Custom system prompt for practice conversations",
     )
+    parser.add_argument(
+        "-s",
+        "--session-id",
+        type=str,
+        required=False,
+        help="Practice session ID (used to name recordings and reports)",
+    )
 
     args, unknown = parser.parse_known_args()
 
     url = args.url or None
     key = args.apikey or os.getenv("DAILY_API_KEY")
     custom_prompt = args.prompt or None
-
+    session_id = args.session_id or uuid.uuid4().hex
+    if not is_valid_session_id(session_id):
+        parser.error(f"Invalid session ID: {session_id!r}")
 
     daily_rest_helper = DailyRESTHelper(
         daily_api_key=key,
@@ -47,4 +65,4 @@ async def configure(aiohttp_session: aiohttp.ClientSession):
 
     token = await daily_rest_helper.get_token(url, expiry_time)
 
-    return (url, token, custom_prompt)
+    return (url, token, custom_prompt, session_id)
@@ -3,7 +3,11 @@ import base64
 import asyncio
 import argparse
 import os
+import shlex
+import signal
 import subprocess
+import time
+import uuid
 import aiohttp
 import websockets
 import traceback
@@ -12,18 +16,25 @@ from contextlib import asynccontextmanager
 from typing import Any, Dict
 from pydantic import BaseModel
 
-from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.websockets import WebSocketDisconnect
 
 from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper, DailyRoomParams
 
-
 from dotenv import load_dotenv
+from loguru import logger
 
 load_dotenv()
 
+# Local modules read their settings from the environment on import
+from analysis import AnalysisQueue, feedback_path, unanalyzed_sessions
+from logging_setup import setup_logging
+from runner import is_valid_session_id
+
+setup_logging("server")
+
 
 
 """
@@ -35,15 +46,28 @@ direct browser access and RTVI client connections. It handles:
 - Managing bot processes
 - Providing connection credentials
 - Monitoring bot status
+- Queueing post-session analysis when a bot exits
+- Collecting per-session resource usage reported by bots
+- Draining for zero-downtime rollouts (SIGTERM or POST /admin/drain): stop
+  admitting sessions, report not-ready, wait for live bots, then exit
 """
 
 
 # Constants
 MAX_BOTS_PER_ROOM = 1
+REAP_INTERVAL_SECS = float(os.getenv("REAP_INTERVAL_SECS", "2"))
+DRAIN_TIMEOUT_SECS = float(os.getenv("DRAIN_TIMEOUT_SECS", "900"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 # Global state
 bot_procs = {}
+bot_sessions = {}
+session_usage = {}
+reaped_bots = set()
 daily_helpers = {}
+analysis_queue = AnalysisQueue()
+drain_state = {"draining": False, "started_at": None, "deadline": None, "task": None}
+previous_sigterm_handler = None
 
 
 def cleanup():
@@ -53,6 +77,75 @@ def cleanup():
         proc.wait()
 
 
+async def reap_finished_bots():
+    """Queue post-session analysis for every bot process that has exited."""
+    while True:
+        for pid, (proc, _) in list(bot_procs.items()):
+            if pid in reaped_bots or proc.poll() is None:
+                continue
+            reaped_bots.add(pid)
+            session_id = bot_sessions.get(pid)
+            if session_id:
+                session_usage.pop(session_id, None)
+                analysis_queue.submit(session_id)
+        await asyncio.sleep(REAP_INTERVAL_SECS)
+
+
+def live_bot_count() -> int:
+    """Number of bot processes that are still running."""
+    return sum(1 for proc, _ in bot_procs.values() if proc.poll() is None)
+
+
+def reject_if_draining():
+    """Refuse new sessions while the server is draining."""
+    if drain_state["draining"]:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is draining and not accepting new sessions",
+            headers={"Retry-After": "5"},
+        )
+
+
+def start_drain(reason: str):
+    """Stop admitting sessions and exit once the live ones have finished."""
+    if drain_state["draining"]:
+        return
+    # Create the task first so a failure can't leave the server draining with nothing to finish it.
+    # It first runs after this returns, when the deadline is already set.
+    task = asyncio.create_task(drain_and_exit())
+    logger.warning(f"Draining ({reason}): {live_bot_count()} live sessions, deadline {DRAIN_TIMEOUT_SECS:.0f}s")
+    drain_state["task"] = task
+    drain_state["started_at"] = time.time()
+    drain_state["deadline"] = time.monotonic() + DRAIN_TIMEOUT_SECS
+    drain_state["draining"] = True
+
+
+async def drain_and_exit():
+    """Wait for live bots (then queued analyses) up to the deadline, then shut down."""
+    while live_bot_count() > 0 and time.monotonic() < drain_state["deadline"]:
+        await asyncio.sleep(REAP_INTERVAL_SECS)
+
+    # Let the reaper queue the last sessions, then hand off queued analyses
+    await asyncio.sleep(REAP_INTERVAL_SECS)
+    remaining = drain_state["deadline"] - time.monotonic()
+    if remaining > 0:
+        try:
+            await asyncio.wait_for(analysis_queue.join(), timeout=remaining)
+        except asyncio.TimeoutError:
+            pass
+
+    logger.warning(f"Drain finished with {live_bot_count()} live sessions, shutting down")
+    request_exit()
+
+
+def request_exit():
+    """Hand SIGTERM back to uvicorn so it runs the normal shutdown."""
+    loop = asyncio.get_running_loop()
+    loop.remove_signal_handler(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, previous_sigterm_handler or signal.SIG_DFL)
+    signal.raise_signal(signal.SIGTERM)
+
+
 def get_bot_file() -> str:
     """Return the bot file to execute."""
     return "bot-gemini"
@@ -67,7 +160,26 @@ async def lifespan(app: FastAPI):
         daily_api_url="https://api.daily.co/v1",
         aiohttp_session=aiohttp_session,
     )
+    analysis_queue.start()
+    # Pick up sessions whose analysis was lost when the server last stopped
+    for session_id in unanalyzed_sessions():
+        analysis_queue.submit(session_id)
+    reaper = asyncio.create_task(reap_finished_bots())
+
+    # Drain on SIGTERM instead of letting uvicorn shut down immediately
+    global previous_sigterm_handler
+    previous_sigterm_handler = signal.getsignal(signal.SIGTERM)
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, start_drain, "SIGTERM")
+    except (NotImplementedError, RuntimeError, ValueError) as e:
+        # Not on the main thread (e.g. under TestClient) or no signal support on this loop
+        logger.warning(f"SIGTERM will not drain: {e}")
+
     yield
+    if drain_state["task"]:
+        drain_state["task"].cancel()
+    reaper.cancel()
+    await analysis_queue.close()
     await aiohttp_session.close()
     cleanup()
 
@@ -99,23 +211,29 @@ async def create_room_and_token() -> tuple[str, str]:
 @app.get("/")
 async def start_agent(request: Request):
     """Create a room, start a bot, and redirect to the room URL."""
-    print("Creating room...")
+    reject_if_draining()
+    logger.info("Creating room...")
     room_url, token = await create_room_and_token()
-    print(f"Room URL: {room_url}")
+    logger.info(f"Room URL: {room_url}")
 
     # Check if max bots limit is reached
     if sum(1 for _, url in bot_procs.values() if url == room_url) >= MAX_BOTS_PER_ROOM:
         raise HTTPException(status_code=500, detail=f"Max bot limit reached for room: {room_url}")
 
+    session_id = uuid.uuid4().hex
     try:
         bot_file = get_bot_file()
         proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token}"],
+            [f"python3 -m {bot_file} -u {room_url} -t {token} -s {shlex.quote(session_id)}"],
             shell=True,
             bufsize=1,
             cwd=os.path.dirname(os.path.abspath(__file__)),
+            # Keep bots out of the server's process group so a SIGTERM sent
+            # to the group during a rollout doesn't cut off live sessions
+            start_new_session=True,
         )
         bot_procs[proc.pid] = (proc, room_url)
+        bot_sessions[proc.pid] = session_id
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
 
@@ -125,24 +243,32 @@ async def start_agent(request: Request):
 @app.post("/connect")
 async def rtvi_connect(request: Request) -> Dict[Any, Any]:
     """Create a room and return connection credentials."""
+    reject_if_draining()
     body = await request.json()
-    session_id = body.get("sessionId")
+    session_id = body.get("sessionId") or uuid.uuid4().hex
+    if not isinstance(session_id, str) or not is_valid_session_id(session_id):
+        raise HTTPException(status_code=400, detail="Invalid sessionId")
     system_prompt = body.get("systemPrompt", "")
     
-    print("Creating room for RTVI connection...")
+    session_logger = logger.bind(session_id=session_id)
+    session_logger.info("Creating room for RTVI connection...")
     room_url, token = await create_room_and_token()
-    print(f"Room URL: {room_url}")
+    session_logger.info(f"Room URL: {room_url}")
 
     # Start bot process with custom system prompt
     try:
         bot_file = get_bot_file()
         proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token} -p '{system_prompt}'"],
+            [f"python3 -m {bot_file} -u {room_url} -t {token} -p '{system_prompt}' -s {shlex.quote(session_id)}"],
             shell=True,
             bufsize=1,
             cwd=os.path.dirname(os.path.abspath(__file__)),
+            # Keep bots out of the server's process group so a SIGTERM sent
+            # to the group during a rollout doesn't cut off live sessions
+            start_new_session=True,
         )
         bot_procs[proc.pid] = (proc, room_url)
+        bot_sessions[proc.pid] = session_id
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
 
@@ -160,6 +286,100 @@ def get_status(pid: int):
     return JSONResponse({"bot_id": pid, "status": status})
 
 
+@app.get("/sessions/{session_id}/feedback")
+def get_session_feedback(session_id: str):
+    """Get the post-session feedback for a finished practice session."""
+    if not is_valid_session_id(session_id):
+        raise HTTPException(status_code=404, detail=f"No feedback for session: {session_id}")
+    path = feedback_path(session_id)
+    if os.path.exists(path):
+        with open(path) as f:
+            return JSONResponse(json.load(f))
+
+    running = any(
+        bot_sessions.get(pid) == session_id and pid not in reaped_bots for pid in bot_procs
+    )
+    if running or session_id in analysis_queue.pending:
+        return JSONResponse({"session_id": session_id, "status": "pending"}, status_code=202)
+
+    raise HTTPException(status_code=404, detail=f"No feedback for session: {session_id}")
+
+
+@app.post("/sessions/{session_id}/usage")
+async def report_session_usage(session_id: str, request: Request):
+    """Store the latest resource usage reported by a bot."""
+    # Only live bots report, which also bounds session_usage by the live session count
+    if not any(bot_sessions.get(pid) == session_id and pid not in reaped_bots for pid in bot_procs):
+        raise HTTPException(status_code=404, detail=f"No live session: {session_id}")
+    usage = await request.json()
+    usage["received_at"] = time.time()
+    session_usage[session_id] = usage
+    return JSONResponse({"status": "ok"})
+
+
+@app.get("/sessions")
+def list_sessions():
+    """List live sessions with their latest resource usage."""
+    sessions = []
+    for pid, (proc, room_url) in bot_procs.items():
+        if proc.poll() is not None:
+            continue
+        session_id = bot_sessions.get(pid)
+        sessions.append(
+            {
+                "session_id": session_id,
+                "bot_id": pid,
+                "room_url": room_url,
+                "usage": session_usage.get(session_id),
+            }
+        )
+    return JSONResponse({"sessions": sessions, "count": len(sessions)})
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness check: the server process is up."""
+    return JSONResponse({"status": "ok"})
+
+
+@app.get("/ready")
+def ready():
+    """Readiness check for the load balancer; not ready while draining."""
+    body = {"ready": not drain_state["draining"], "live_sessions": live_bot_count()}
+    return JSONResponse(body, status_code=503 if drain_state["draining"] else 200)
+
+
+def check_admin_token(token: str | None):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/drain")
+async def admin_drain(x_admin_token: str | None = Header(default=None)):
+    """Start draining: stop admitting sessions and exit once the live ones end."""
+    check_admin_token(x_admin_token)
+    start_drain("admin request")
+    return get_drain_status(x_admin_token)
+
+
+@app.get("/admin/drain")
+def get_drain_status(x_admin_token: str | None = Header(default=None)):
+    """Get the drain progress."""
+    check_admin_token(x_admin_token)
+    remaining = None
+    if drain_state["draining"]:
+        remaining = max(0.0, drain_state["deadline"] - time.monotonic())
+    return JSONResponse(
+        {
+            "draining": drain_state["draining"],
+            "started_at": drain_state["started_at"],
+            "deadline_remaining_secs": remaining,
+            "live_sessions": live_bot_count(),
+            "pending_analyses": len(analysis_queue.pending),
+        }
+    )
+
+
 
 
 
@@ -0,0 +1,195 @@
+"""
+Per-Session Resource Accounting
+
+Tracks what a single practice session costs so nodes can be sized:
+- Memory (current and peak RSS, plus tracemalloc if SESSION_TRACEMALLOC=1)
+- CPU time
+- Audio bytes in and out
+- Conversation context size and tool-call count
+
+Each bot runs one session, so process-level numbers are the session's numbers.
+Usage is reported to server.py periodically and at session end, and checked
+against configurable budgets that either warn or end the session.
+"""
+
+import asyncio
+import json
+import os
+import resource
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from loguru import logger
+
+from pipecat.frames.frames import Frame, FunctionCallInProgressFrame, InputAudioRawFrame, OutputAudioRawFrame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+VOICE_SERVER_URL = os.getenv("VOICE_SERVER_URL", f"http://localhost:{os.getenv('FAST_API_PORT', '7860')}")
+SESSION_REPORT_INTERVAL_SECS = float(os.getenv("SESSION_REPORT_INTERVAL_SECS", "10"))
+SESSION_TRACEMALLOC = os.getenv("SESSION_TRACEMALLOC") == "1"
+
+# "warn" only logs; "end" also ends the session
+SESSION_BUDGET_ACTION = os.getenv("SESSION_BUDGET_ACTION", "warn")
+
+
+def _budget(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+# Budgets are unset (unlimited) unless configured
+SESSION_BUDGETS = {
+    "rss_mb": _budget("SESSION_MAX_RSS_MB"),
+    "cpu_secs": _budget("SESSION_MAX_CPU_SECS"),
+    "audio_mb": _budget("SESSION_MAX_AUDIO_MB"),
+    "context_messages": _budget("SESSION_MAX_CONTEXT_MESSAGES"),
+    "tool_calls": _budget("SESSION_MAX_TOOL_CALLS"),
+}
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class _AccountingTap(FrameProcessor):
+    def __init__(self, accountant: "SessionAccountant", is_output: bool):
+        super().__init__()
+        self._accountant = accountant
+        self._is_output = is_output
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        self._accountant.count(frame, self._is_output)
+        await self.push_frame(frame, direction)
+
+
+class SessionAccountant:
+    """Resource accounting and budget enforcement for a bot session.
+
+    Like the transport, it contributes two processors: `input()` goes after
+    `transport.input()` and `output()` goes right after the LLM.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        context: OpenAILLMContext,
+        on_budget_exceeded: Optional[Callable[[str], Awaitable[None]]] = None,
+        budgets: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        self._session_id = session_id
+        self._context = context
+        self._on_budget_exceeded = on_budget_exceeded
+        self._budgets = budgets if budgets is not None else SESSION_BUDGETS
+        self._exceeded = set()
+
+        self._started = time.monotonic()
+        self._cpu_started = time.process_time()
+        self.audio_bytes_in = 0
+        self.audio_bytes_out = 0
+        self.tool_calls = 0
+
+        self._input = _AccountingTap(self, is_output=False)
+        self._output = _AccountingTap(self, is_output=True)
+
+        if SESSION_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def input(self) -> FrameProcessor:
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        return self._output
+
+    def count(self, frame: Frame, is_output: bool):
+        # The LLM passes user audio through and pushes tool calls both ways, so
+        # each kind of frame is counted by one tap only
+        if isinstance(frame, InputAudioRawFrame):
+            if not is_output:
+                self.audio_bytes_in += len(frame.audio)
+        elif isinstance(frame, OutputAudioRawFrame):
+            if is_output:
+                self.audio_bytes_out += len(frame.audio)
+        elif isinstance(frame, FunctionCallInProgressFrame) and is_output:
+            self.tool_calls += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current resource usage of the session."""
+        messages = self._context.messages
+        usage = {
+            "session_id": self._session_id,
+            "pid": os.getpid(),
+            "duration_secs": time.monotonic() - self._started,
+            "cpu_secs": time.process_time() - self._cpu_started,
+            "rss_mb": current_rss_bytes() / 2**20,
+            "peak_rss_mb": peak_rss_bytes() / 2**20,
+            "audio_bytes_in": self.audio_bytes_in,
+            "audio_bytes_out": self.audio_bytes_out,
+            "context_messages": len(messages),
+            "context_chars": len(json.dumps(messages, default=str)),
+            "tool_calls": self.tool_calls,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            usage["traced_mb"] = current / 2**20
+            usage["traced_peak_mb"] = peak / 2**20
+        return usage
+
+    async def check_budgets(self, usage: Dict[str, Any]):
+        """Warn about (or end the session for) every budget exceeded for the first time."""
+        values = {
+            "rss_mb": usage["rss_mb"],
+            "cpu_secs": usage["cpu_secs"],
+            "audio_mb": (usage["audio_bytes_in"] + usage["audio_bytes_out"]) / 2**20,
+            "context_messages": usage["context_messages"],
+            "tool_calls": usage["tool_calls"],
+        }
+        for name, limit in self._budgets.items():
+            if limit is None or name in self._exceeded or values[name] <= limit:
+                continue
+            self._exceeded.add(name)
+            reason = f"{name} {values[name]:.1f} over budget {limit:.1f}"
+            logger.warning(f"Session {self._session_id} {reason}")
+            if SESSION_BUDGET_ACTION == "end" and self._on_budget_exceeded:
+                await self._on_budget_exceeded(reason)
+
+    async def report(self, session: aiohttp.ClientSession, final: bool = False) -> Dict[str, Any]:
+        """Check budgets and send the current usage to server.py."""
+        usage = self.snapshot()
+        if not final:
+            await self.check_budgets(usage)
+        usage["final"] = final
+        usage["budgets_exceeded"] = sorted(self._exceeded)
+        try:
+            async with session.post(
+                f"{VOICE_SERVER_URL}/sessions/{self._session_id}/usage",
+                json=usage,
+                timeout=aiohttp.ClientTimeout(total=5),
+            ) as response:
+                if response.status != 200:
+                    logger.debug(f"Usage report rejected with status {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Could not report usage to {VOICE_SERVER_URL}: {e}")
+        return usage
+
+    async def run_reporter(self, session: aiohttp.ClientSession):
+        """Report usage every SESSION_REPORT_INTERVAL_SECS until cancelled."""
+        while True:
+            await asyncio.sleep(SESSION_REPORT_INTERVAL_SECS)
+            await self.report(session)